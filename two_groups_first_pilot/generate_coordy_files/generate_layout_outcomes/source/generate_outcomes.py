@@ -15,17 +15,85 @@ Rules:
     P2 view uses URL containing "P1_Y_P2_X"
 - Redundant keys required:
     both "P1_X_P2_Y" and "P2_Y_P1_X" must exist (same payload).
+    --no-redundant-keys writes only "P1_X_P2_Y" for consumers that accept it.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
-import re
+import os
+import sys
 from pathlib import Path
-from typing import Dict, Tuple, Any, List
+from typing import Dict, Iterator, Tuple, Any, List, Optional
+
+try:  # optional: stream the input instead of loading it whole
+    import ijson
+except ImportError:
+    ijson = None
+
+try:  # optional: faster JSON encoder
+    import orjson
+except ImportError:
+    orjson = None
+
+_GRID: List[Tuple[int, int]] = [(x, y) for x in range(1, 10) for y in range(1, 10)]
+_GRID_SET = frozenset(_GRID)
+_KEYS: Dict[Tuple[int, int], Tuple[str, str]] = {
+    (x, y): (sys.intern(f"P1_{x}_P2_{y}"), sys.intern(f"P2_{y}_P1_{x}")) for x, y in _GRID
+}
+_SUCCESS_TEXT: Dict[Tuple[int, int], str] = {
+    (x, y): sys.intern(f"Success! One player chose {x} and the other {y}.") for x, y in _GRID
+}
+_FAIL_TEXT: Dict[Tuple[int, int], str] = {
+    (x, y): sys.intern(
+        f"Coordination Failed. One player chose {x} and the other {y}. Players get their default points."
+    )
+    for x, y in _GRID
+}
+
+
+def _iter_entries(existing_json_path: Path) -> Iterator[Any]:
+    """
+    Yield the values of the top-level JSON object, in file order.
+    """
+    if ijson is not None:
+        # Only one entry is held in memory at a time
+        with existing_json_path.open("rb") as f:
+            yield from (entry for _, entry in ijson.kvitems(f, ""))
+        return
+
+    yield from json.loads(existing_json_path.read_bytes()).values()
 
-PAIR_RE = re.compile(r"P1_([1-9])_P2_([1-9])\.png")
+
+def _iter_history_urls(existing_json_path: Path) -> Iterator[str]:
+    """
+    Yield every non-empty string feedback.historyImage1, then historyImage2, per entry.
+    """
+    for entry in _iter_entries(existing_json_path):
+        fb = entry.get("feedback") if entry else None
+        if not fb:
+            continue
+        for key in ("historyImage1", "historyImage2"):
+            url = fb.get(key)
+            if url and isinstance(url, str):
+                yield url
+
+
+def _pair_from_url(url: str) -> Optional[Tuple[int, int]]:
+    """
+    (x,y) from the first "P1_X_P2_Y.png" in url (X, Y in 1..9), else None.
+    """
+    # Anchor on ".png" so a "P1_" later in the URL (e.g. in the query) can't hide the filename
+    j = url.find(".png", 9)
+    while j >= 0:
+        if url[j - 9:j - 6] == "P1_" and url[j - 5:j - 1] == "_P2_":
+            x = ord(url[j - 6]) - 48
+            y = ord(url[j - 1]) - 48
+            if 1 <= x <= 9 and 1 <= y <= 9:
+                return x, y
+        j = url.find(".png", j + 1)
+    return None
 
 
 def load_image_map(existing_json_path: Path) -> Tuple[Dict[Tuple[int, int], str], List[str]]:
@@ -35,99 +103,111 @@ def load_image_map(existing_json_path: Path) -> Tuple[Dict[Tuple[int, int], str]
       - image_map: dict mapping (x,y) to URL
       - all_links: list of all historyImage links found (deduped, in encounter order)
     """
-    data = json.loads(existing_json_path.read_text(encoding="utf-8"))
-
     image_map: Dict[Tuple[int, int], str] = {}
     all_links: List[str] = []
     seen_links = set()
 
-    def consider(url: str) -> None:
-        if not url or not isinstance(url, str):
-            return
-        if url not in seen_links:
-            all_links.append(url)
-            seen_links.add(url)
-
-        m = PAIR_RE.search(url)
-        if not m:
-            return
-        x, y = int(m.group(1)), int(m.group(2))
-        # If duplicates exist, keep the first seen (stable).
-        image_map.setdefault((x, y), url)
+    for url in _iter_history_urls(existing_json_path):
+        # A repeated URL maps to the same (x,y) it did the first time
+        if url in seen_links:
+            continue
+        seen_links.add(url)
+        all_links.append(url)
 
-    for _, entry in data.items():
-        fb = (entry or {}).get("feedback", {})
-        consider(fb.get("historyImage1", ""))
-        consider(fb.get("historyImage2", ""))
+        xy = _pair_from_url(url)
+        if xy is None:
+            continue
+        # If duplicates exist, keep the first seen (stable).
+        image_map.setdefault(xy, url)
 
     return image_map, all_links
 
 
+def _build_success_template(image_map: Dict[Tuple[int, int], str]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """
+    Validate image_map and prebuild every payload that does not depend on the default points.
+    Success cells (x + y <= 10) are complete and can be shared between outcome files;
+    failure cells carry text + images only, points are filled in by build_outcomes.
+    """
+    missing = _GRID_SET - image_map.keys()
+    if missing:
+        msg = (
+            "Missing history image URLs for these pairs (need both (x,y) and swapped (y,x) "
+            "because P2 view uses swapped image):\n"
+            + ", ".join([f"({x},{y})" for x, y in sorted(missing)])
+        )
+        raise ValueError(msg)
+
+    template: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for x, y in _GRID:
+        success = (x + y) <= 10
+        template[(x, y)] = {
+            "feedback": {
+                "text": _SUCCESS_TEXT[(x, y)] if success else _FAIL_TEXT[(x, y)],
+                "pointsOne": x if success else None,  # always P1
+                "pointsTwo": y if success else None,  # always P2
+                "historyImage1": image_map[(x, y)],  # what P1 should see
+                "historyImage2": image_map[(y, x)],  # what P2 should see
+            }
+        }
+    return template
+
+
 def build_outcomes(
     image_map: Dict[Tuple[int, int], str],
     default_p1: int,
     default_p2: int,
+    template: Optional[Dict[Tuple[int, int], Dict[str, Any]]] = None,
+    redundant_keys: bool = True,
 ) -> Dict[str, Any]:
     """
     Build full 9x9 outcomes with redundant keys.
     Each value has shape: {"feedback": {...}} matching your existing schema.
+    Pass a template from _build_success_template to reuse it across colour combos.
     """
-    missing: List[Tuple[int, int]] = []
-    for x in range(1, 10):
-        for y in range(1, 10):
-            if (x, y) not in image_map:
-                missing.append((x, y))
-            if (y, x) not in image_map:
-                missing.append((y, x))
-
-    if missing:
-        missing_unique = sorted(set(missing))
-        msg = (
-            "Missing history image URLs for these pairs (need both (x,y) and swapped (y,x) "
-            "because P2 view uses swapped image):\n"
-            + ", ".join([f"({x},{y})" for x, y in missing_unique])
-        )
-        raise ValueError(msg)
+    if template is None:
+        template = _build_success_template(image_map)
 
     out: Dict[str, Any] = {}
 
-    for x in range(1, 10):
-        for y in range(1, 10):
-            success = (x + y) <= 10
-
-            if success:
-                text = f"Success! One player chose {x} and the other {y}."
-                p1_points = x
-                p2_points = y
-            else:
-                text = (
-                    f"Coordination Failed. One player chose {x} and the other {y}. "
-                    f"Players get their default points."
-                )
-                p1_points = default_p1
-                p2_points = default_p2
-
+    for x, y in _GRID:
+        payload = template[(x, y)]
+        if (x + y) > 10:
+            fb = payload["feedback"]
             payload = {
                 "feedback": {
-                    "text": text,
-                    "pointsOne": p1_points,  # always P1
-                    "pointsTwo": p2_points,  # always P2
-                    "historyImage1": image_map[(x, y)],  # what P1 should see
-                    "historyImage2": image_map[(y, x)],  # what P2 should see
+                    "text": fb["text"],
+                    "pointsOne": default_p1,
+                    "pointsTwo": default_p2,
+                    "historyImage1": fb["historyImage1"],
+                    "historyImage2": fb["historyImage2"],
                 }
             }
 
-            # Redundant keys (same payload)
-            key_a = f"P1_{x}_P2_{y}"
-            key_b = f"P2_{y}_P1_{x}"
-            out[key_a] = payload
+        # Redundant keys (same payload)
+        key_a, key_b = _KEYS[(x, y)]
+        out[key_a] = payload
+        if redundant_keys:
             out[key_b] = payload
 
     return out
 
 
+# Match text-mode newline translation (os.linesep); JSON output never has a raw newline
+# inside a string, so every b"\n" is a line break.
+_NEWLINE = os.linesep.encode()
+
+
+def _native_newlines(data: bytes) -> bytes:
+    return data if _NEWLINE == b"\n" else data.replace(b"\n", _NEWLINE)
+
+
 def write_json(path: Path, obj: Any) -> None:
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    path.write_bytes(_native_newlines(data))
 
 
 def main() -> None:
@@ -146,22 +226,38 @@ def main() -> None:
         action="store_true",
         help="Also write a text file with all harvested historyImage links.",
     )
+    ap.add_argument(
+        "--no-redundant-keys",
+        action="store_true",
+        help='Only write "P1_X_P2_Y" keys (skip the duplicate "P2_Y_P1_X" keys); halves output size.',
+    )
     args = ap.parse_args()
 
     image_map, links = load_image_map(args.input)
 
+    template = _build_success_template(image_map)
+
     args.outdir.mkdir(parents=True, exist_ok=True)
 
+    def outcomes(default_p1: int, default_p2: int) -> Dict[str, Any]:
+        return build_outcomes(
+            image_map,
+            default_p1=default_p1,
+            default_p2=default_p2,
+            template=template,
+            redundant_keys=not args.no_redundant_keys,
+        )
+
     # blue_blue: P1 blue, P2 blue
-    blue_blue = build_outcomes(image_map, default_p1=args.blue_default, default_p2=args.blue_default)
+    blue_blue = outcomes(default_p1=args.blue_default, default_p2=args.blue_default)
     write_json(args.outdir / f"outcomes-blue_blue_{args.blue_default}.json", blue_blue)
 
     # red_red: P1 red, P2 red
-    red_red = build_outcomes(image_map, default_p1=args.red_default, default_p2=args.red_default)
+    red_red = outcomes(default_p1=args.red_default, default_p2=args.red_default)
     write_json(args.outdir / f"outcomes-red_red_{args.red_default}.json", red_red)
 
     # red_blue: P1 red, P2 blue
-    red_blue = build_outcomes(image_map, default_p1=args.red_default, default_p2=args.blue_default)
+    red_blue = outcomes(default_p1=args.red_default, default_p2=args.blue_default)
     write_json(args.outdir / f"outcomes-red_blue_R{args.red_default}_B{args.blue_default}.json", red_blue)
 
     if args.dump_links:
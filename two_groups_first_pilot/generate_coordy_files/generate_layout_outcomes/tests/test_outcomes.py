@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import generate_outcomes as go
+
+INPUTS = Path(__file__).resolve().parent.parent / "inputs"
+
+URL = "https://example.com/o/img%2F{}.png?alt=media"
+
+MIXED = {
+    # historyImage2 comes first in the file, but historyImage1 is read first
+    "a": {"feedback": {"historyImage2": URL.format("P1_1_P2_2"), "historyImage1": URL.format("P1_3_P2_4")}},
+    # feedback nested below the entry is not an outcome and must be ignored
+    "b": {"meta": {"feedback": {"historyImage1": URL.format("P1_5_P2_5")}}},
+    # non-string and empty values are skipped
+    "c": {"feedback": {"historyImage1": 5, "historyImage2": ""}},
+    "d": None,
+    "e": {"feedback": {"historyImage1": URL.format("P1_1_P2_2"), "historyImage2": URL.format("P1_6_P2_7")}},
+}
+
+
+def _load_both(monkeypatch, path):
+    if go.ijson is None:
+        pytest.skip("ijson not installed")
+    with_ijson = go.load_image_map(path)
+    monkeypatch.setattr(go, "ijson", None)
+    return with_ijson, go.load_image_map(path)
+
+
+def test_ijson_and_json_branches_agree(tmp_path, monkeypatch):
+    path = tmp_path / "existing.json"
+    path.write_text(json.dumps(MIXED), encoding="utf-8")
+
+    with_ijson, with_json = _load_both(monkeypatch, path)
+
+    assert with_ijson == with_json
+    image_map, links = with_json
+    assert image_map == {
+        (3, 4): URL.format("P1_3_P2_4"),
+        (1, 2): URL.format("P1_1_P2_2"),
+        (6, 7): URL.format("P1_6_P2_7"),
+    }
+    assert links == [URL.format("P1_3_P2_4"), URL.format("P1_1_P2_2"), URL.format("P1_6_P2_7")]
+
+
+@pytest.mark.parametrize("path", sorted(INPUTS.glob("*.json")), ids=lambda p: p.name)
+def test_ijson_and_json_branches_agree_on_inputs(monkeypatch, path):
+    with_ijson, with_json = _load_both(monkeypatch, path)
+
+    assert with_ijson == with_json
+    assert len(with_json[0]) == 81
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("img/P1_2_P2_1.png", (2, 1)),
+        ("https://x/o/img%2FP1_9_P2_9.png?alt=media&token=abc", (9, 9)),
+        # "P1_" after the filename must not hide it
+        ("y/P1_2_P2_1.png?alt=media&token=P1_", (2, 1)),
+        ("y/P1_2_P2_1.png?token=P1_3_P2_4", (2, 1)),
+        # digit 0 and non-digits are not valid choices
+        ("img/P1_0_P2_1.png", None),
+        ("img/P1_1_P2_0.png", None),
+        ("img/P1_a_P2_1.png", None),
+        ("img/P1_1_P2_12.png", None),
+        # the first valid match wins
+        ("P1_3_P2_4.png/P1_5_P2_6.png", (3, 4)),
+        ("P1_0_P2_4.png/P1_5_P2_6.png", (5, 6)),
+        ("img/P1_1_P2_2.jpg", None),
+        (".png", None),
+        ("", None),
+    ],
+)
+def test_pair_from_url(url, expected):
+    assert go._pair_from_url(url) == expected
+
+
+def test_build_outcomes_without_redundant_keys():
+    image_map = {(x, y): f"img/P1_{x}_P2_{y}.png" for x in range(1, 10) for y in range(1, 10)}
+
+    full = go.build_outcomes(image_map, default_p1=3, default_p2=7)
+    single = go.build_outcomes(image_map, default_p1=3, default_p2=7, redundant_keys=False)
+
+    assert len(full) == 162
+    assert len(single) == 81
+    assert all(k.startswith("P1_") for k in single)
+    for x in range(1, 10):
+        for y in range(1, 10):
+            assert single[f"P1_{x}_P2_{y}"] == full[f"P1_{x}_P2_{y}"] == full[f"P2_{y}_P1_{x}"]
+
+    fb = single["P1_4_P2_6"]["feedback"]
+    assert (fb["pointsOne"], fb["pointsTwo"]) == (4, 6)
+    assert fb["historyImage1"] == "img/P1_4_P2_6.png"
+    assert fb["historyImage2"] == "img/P1_6_P2_4.png"
+    fb = single["P1_5_P2_6"]["feedback"]
+    assert (fb["pointsOne"], fb["pointsTwo"]) == (3, 7)
@@ -2,11 +2,24 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import random
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Any
+
+try:  # optional: faster JSON encoder
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional: vectorised shuffles for large player counts
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # -----------------------------
@@ -14,18 +27,57 @@ from typing import Dict, List, Optional, Tuple, Any
 # -----------------------------
 
 def utc_now_iso_millis() -> str:
-    dt = datetime.now(timezone.utc)
-    return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    s, ms = divmod(time.time_ns() // 1_000_000, 1000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(s))}.{ms:03d}Z"
 
 
 def read_json(path: Path) -> Any:
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
-    return json.loads(path.read_text(encoding="utf-8"))
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Encode obj exactly as save_json would (2-space indent, UTF-8).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# Match text-mode newline translation (os.linesep); JSON output never has a raw newline
+# inside a string, so every b"\n" is a line break.
+_NEWLINE = os.linesep.encode()
+
+
+def _native_newlines(data: bytes) -> bytes:
+    return data if _NEWLINE == b"\n" else data.replace(b"\n", _NEWLINE)
 
 
 def save_json(path: Path, obj: Any) -> None:
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    path.write_bytes(_native_newlines(_dumps(obj)))
+
+
+def stream_save_pairing(path: Path, meta: dict, rounds_iter: Iterable[Tuple[str, dict]]) -> None:
+    """
+    Write {**meta, "rounds": dict(rounds_iter)} with the same bytes as save_json,
+    encoding one round at a time so the full rounds dict never has to exist.
+    """
+    with path.open("wb", buffering=1 << 20) as f:
+        f.write(_native_newlines(b"{\n"))
+        for key, value in meta.items():
+            f.write(_native_newlines(b"  " + _dumps(key) + b": " + _dumps(value) + b",\n"))
+        f.write(b'  "rounds": {')
+        sep = b"\n"
+        for round_key, round_obj in rounds_iter:
+            chunk = sep + b"    " + _dumps(round_key) + b": " + _dumps(round_obj).replace(b"\n", b"\n    ")
+            f.write(_native_newlines(chunk))
+            sep = b",\n"
+        f.write(_native_newlines(b"\n  }\n}"))
 
 def utc_now_for_filename() -> str:
     """
@@ -121,39 +173,52 @@ class LayoutSpec:
     position_blue: int
 
 
-def build_default_layouts() -> Dict[str, LayoutSpec]:
-    # Base names only; we’ll append _1/_2 at generation time
-    return {
-        "red_red": LayoutSpec(layout_id="red_red", position_red=1, position_blue=2),
-        "red_blue": LayoutSpec(layout_id="red_blue", position_red=1, position_blue=2),
-        "blue_blue": LayoutSpec(layout_id="blue_blue", position_red=1, position_blue=2),
-    }
+# Base names only; we’ll append _1/_2 at generation time
+# Read-only view of frozen specs, so every call can safely share the same object
+_DEFAULT_LAYOUTS: Mapping[str, LayoutSpec] = MappingProxyType({
+    "red_red": LayoutSpec(layout_id="red_red", position_red=1, position_blue=2),
+    "red_blue": LayoutSpec(layout_id="red_blue", position_red=1, position_blue=2),
+    "blue_blue": LayoutSpec(layout_id="blue_blue", position_red=1, position_blue=2),
+})
+
+
+def build_default_layouts() -> Mapping[str, LayoutSpec]:
+    return _DEFAULT_LAYOUTS
 
 
 
-def assign_teams(player_ids: List[str], red_prop: float, rng: random.Random) -> Dict[str, str]:
+def assign_teams(player_ids: List[str], red_prop: float, rng: Any) -> Dict[str, str]:
+    """
+    rng is a random.Random (CLI default, keeps seeded outputs stable)
+    or a numpy Generator, which shuffles in C for large player counts.
+    """
     if not (0.0 <= red_prop <= 1.0):
         raise ValueError("--red-prop must be between 0 and 1.")
 
-    players = player_ids[:]
-    rng.shuffle(players)
-
-    n = len(players)
+    n = len(player_ids)
     n_red = int(round(red_prop * n))
     n_red = max(0, min(n, n_red))
 
-    team_map: Dict[str, str] = {}
-    for i, pid in enumerate(players):
-        team_map[pid] = "red" if i < n_red else "blue"
-    return team_map
+    if np is not None and isinstance(rng, np.random.Generator):
+        teams = np.full(n, "blue", dtype=object)
+        teams[rng.permutation(n)[:n_red]] = "red"
+        return dict(zip(player_ids, teams.tolist()))
+
+    players = player_ids[:]
+    rng.shuffle(players)
+    return dict(zip(players, ["red"] * n_red + ["blue"] * (n - n_red)))
 
 
 def pick_base_layout_and_positions(
     p1: str,
     p2: str,
     team_map: Dict[str, str],
-    layouts: Dict[str, LayoutSpec],
-) -> Tuple[str, str, int, int]:
+    layouts: Mapping[str, LayoutSpec],
+) -> Tuple[str, str, str, int, int]:
+    """
+    Returns (base_layout, player1Id, player2Id, position1, position2).
+    For red_blue, player1 is always the red player.
+    """
     t1, t2 = team_map[p1], team_map[p2]
 
     if t1 == "red" and t2 == "red":
@@ -177,29 +242,75 @@ def make_random_matching(player_ids: List[str], rng: random.Random) -> List[Tupl
     return [(ids[i], ids[i + 1]) for i in range(0, len(ids) - 1, 2)]  # drops last if odd
 
 
-def pairs_signature(pairs: List[Tuple[str, str]]) -> set[frozenset[str]]:
-    return {frozenset((a, b)) for a, b in pairs}
+def matching_hash(pairs: List[Tuple[str, str]]) -> int:
+    """
+    Order-independent hash of a matching (XOR of its sorted pair hashes).
+    Different hashes imply different matchings; a collision only costs an extra retry.
+    """
+    h = 0
+    for a, b in pairs:
+        h ^= hash((a, b) if a < b else (b, a))
+    return h
 
 
 def make_block_matching(
     player_ids: List[str],
     rng: random.Random,
-    prev_block_sig: Optional[set[frozenset[str]]] = None,
+    prev_block_hash: Optional[int] = None,
     max_tries: int = 200,
 ) -> List[Tuple[str, str]]:
-    if prev_block_sig is None:
+    if prev_block_hash is None:
         return make_random_matching(player_ids, rng)
 
     best = None
     for _ in range(max_tries):
         pairs = make_random_matching(player_ids, rng)
-        if pairs_signature(pairs) != prev_block_sig:
+        if matching_hash(pairs) != prev_block_hash:
             return pairs
         best = pairs
 
     return best if best is not None else make_random_matching(player_ids, rng)
 
 
+def iter_block_matchings(
+    player_ids: List[str],
+    n_blocks: int,
+    rng: Any,
+    max_tries: int = 200,
+) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Yield one matching per block, each differing from the previous block when possible.
+    With a numpy Generator all block permutations are drawn in one rng.permuted call
+    and only rows that repeat the previous block are redrawn.
+    """
+    if np is None or not isinstance(rng, np.random.Generator):
+        prev_hash: Optional[int] = None
+        for _ in range(n_blocks):
+            pairs = make_block_matching(player_ids=player_ids, rng=rng, prev_block_hash=prev_hash)
+            prev_hash = matching_hash(pairs)
+            yield pairs
+        return
+
+    n = len(player_ids)
+    ids = np.array(player_ids, dtype=object)
+    perms = np.tile(np.arange(n), (n_blocks, 1))
+    rng.permuted(perms, axis=1, out=perms)
+
+    prev_hash = None
+    for row in perms:
+        order = ids[row].tolist()
+        pairs = list(zip(order[0::2], order[1::2]))  # drops last if odd
+        h = matching_hash(pairs)
+        tries = 1
+        while prev_hash is not None and tries < max_tries and h == prev_hash:
+            order = ids[rng.permutation(n)].tolist()
+            pairs = list(zip(order[0::2], order[1::2]))
+            h = matching_hash(pairs)
+            tries += 1
+        prev_hash = h
+        yield pairs
+
+
 def generate_pairing_json(
     player_ids: List[str],
     rounds: int,
@@ -212,74 +323,158 @@ def generate_pairing_json(
     experiment_type: str = "realtime",
     pairing_mode: str = "manual",
     layouts_override: Optional[Dict[str, LayoutSpec]] = None,
+    created_at: Optional[str] = None,
+    numpy_rng: bool = False,
 ) -> dict:
+    root, rounds_iter = _pairing_parts(
+        player_ids=player_ids,
+        rounds=rounds,
+        block_size=block_size,
+        team_map=team_map,
+        seed=seed,
+        pair_status=pair_status,
+        round_status=round_status,
+        include_root_metadata=include_root_metadata,
+        experiment_type=experiment_type,
+        pairing_mode=pairing_mode,
+        layouts_override=layouts_override,
+        created_at=created_at,
+        numpy_rng=numpy_rng,
+    )
+    root["rounds"] = dict(rounds_iter)
+    return root
+
+
+def write_pairing_json(path: Path, **kwargs: Any) -> None:
+    """
+    Same arguments and output as save_json(path, generate_pairing_json(...)),
+    but rounds are encoded and written one at a time instead of all held in memory.
+    """
+    root, rounds_iter = _pairing_parts(**kwargs)
+    stream_save_pairing(path, root, rounds_iter)
+
+
+def _pairing_parts(
+    player_ids: List[str],
+    rounds: int,
+    block_size: int,
+    team_map: Dict[str, str],
+    seed: Optional[int] = None,
+    pair_status: str = "pending",
+    round_status: str = "pending",
+    include_root_metadata: bool = True,
+    experiment_type: str = "realtime",
+    pairing_mode: str = "manual",
+    layouts_override: Optional[Dict[str, LayoutSpec]] = None,
+    created_at: Optional[str] = None,
+    numpy_rng: bool = False,
+) -> Tuple[dict, Iterator[Tuple[str, dict]]]:
+    """
+    Validate eagerly, then return the root object (without "rounds")
+    and a lazy iterator of (round_key, round_obj).
+    numpy_rng draws matchings from numpy.random.default_rng(seed) instead of random.Random(seed).
+    """
     if rounds < 1:
         raise ValueError("--rounds must be >= 1")
     if block_size < 1:
         raise ValueError("--block-size must be >= 1")
     if len(player_ids) < 2:
         raise ValueError("Need at least 2 players to create pairs.")
-    if set(player_ids) != set(team_map.keys()):
+    if len(player_ids) != len(team_map) or any(p not in team_map for p in player_ids):
         # team_map can have same keys but in different order; ensure coverage
-        missing = set(player_ids) - set(team_map.keys())
-        extra = set(team_map.keys()) - set(player_ids)
+        player_set = set(player_ids)
+        missing = player_set - team_map.keys()
+        extra = team_map.keys() - player_set
         if missing:
             raise ValueError(f"team_map missing players: {sorted(missing)}")
         if extra:
             raise ValueError(f"team_map has unknown players: {sorted(extra)}")
+    if numpy_rng and np is None:
+        raise ValueError("numpy_rng requires numpy to be installed.")
 
-    rng = random.Random(seed)
-    layouts = layouts_override or build_default_layouts()
+    # One timestamp for every pair's createdAt and the root lastUpdated
+    if created_at is None:
+        created_at = utc_now_iso_millis()
 
-    created_at = utc_now_iso_millis()
-    rounds_obj: Dict[str, dict] = {}
-
-    prev_sig: Optional[set[frozenset[str]]] = None
-    current_block_pairs: List[Tuple[str, str]] = []
+    root: dict = {}
+    if include_root_metadata:
+        root = {
+            "experimentType": experiment_type,
+            "pairingMode": pairing_mode,
+            "lastUpdated": created_at,
+        }
 
-    for r in range(1, rounds + 1):
-        if (r - 1) % block_size == 0:
-            current_block_pairs = make_block_matching(
-                player_ids=player_ids,
-                rng=rng,
-                prev_block_sig=prev_sig,
-            )
-            prev_sig = pairs_signature(current_block_pairs)
+    rounds_iter = _iter_rounds(
+        player_ids=player_ids,
+        rounds=rounds,
+        block_size=block_size,
+        team_map=team_map,
+        rng=np.random.default_rng(seed) if numpy_rng else random.Random(seed),
+        layouts=layouts_override or build_default_layouts(),
+        created_at=created_at,
+        pair_status=pair_status,
+        round_status=round_status,
+    )
+    return root, rounds_iter
 
-        pairs_obj: Dict[str, dict] = {}
-        for idx, (a, b) in enumerate(current_block_pairs):
-            suffix = 1 if (r % 2 == 1) else 2
 
+def _iter_rounds(
+    player_ids: List[str],
+    rounds: int,
+    block_size: int,
+    team_map: Dict[str, str],
+    rng: Any,
+    layouts: Mapping[str, LayoutSpec],
+    created_at: str,
+    pair_status: str,
+    round_status: str,
+) -> Iterator[Tuple[str, dict]]:
+    n_blocks = (rounds + block_size - 1) // block_size
+    block_matchings = iter_block_matchings(player_ids, n_blocks, rng)
+
+    # Every block has len(player_ids) // 2 pairs, so keys can be formatted once
+    pair_keys = [f"pair_{i:03d}" for i in range(len(player_ids) // 2)]
+    round_keys = [f"round{r}" for r in range(1, rounds + 1)]
+
+    for block_start, current_block_pairs in zip(range(1, rounds + 1, block_size), block_matchings):
+        # Pairs are fixed for the whole block; only the layout suffix changes per round
+        base_layouts: List[str] = []
+        protos: List[dict] = []
+        for a, b in current_block_pairs:
             base_layout, p1, p2, pos1, pos2 = pick_base_layout_and_positions(
                 a, b, team_map=team_map, layouts=layouts
             )
-            layout_id = f"{base_layout}_{suffix}"
-
-            pair_key = f"pair_{idx:03d}"
-            pairs_obj[pair_key] = {
+            base_layouts.append(base_layout)
+            protos.append({
                 "createdAt": created_at,
-                "layoutId": layout_id,
+                "layoutId": None,  # filled per round
                 "player1Id": p1,
                 "player2Id": p2,
                 "position1": pos1,
                 "position2": pos2,
                 "status": pair_status,
+            })
+
+        # Indexed by r % 2: even rounds use "_2", odd rounds "_1"
+        layout_ids = (
+            [f"{bl}_2" for bl in base_layouts],
+            [f"{bl}_1" for bl in base_layouts],
+        )
+
+        for r in range(block_start, min(block_start + block_size, rounds + 1)):
+            round_layout_ids = layout_ids[r % 2]
+
+            pairs_obj: Dict[str, dict] = {}
+            for idx, proto in enumerate(protos):
+                pair = proto.copy()
+                pair["layoutId"] = round_layout_ids[idx]
+                pairs_obj[pair_keys[idx]] = pair
+
+            yield round_keys[r - 1], {
+                "pairs": pairs_obj,
+                "status": round_status,
             }
 
-        rounds_obj[f"round{r}"] = {
-            "pairs": pairs_obj,
-            "status": round_status,
-        }
-
-    if include_root_metadata:
-        return {
-            "experimentType": experiment_type,
-            "pairingMode": pairing_mode,
-            "lastUpdated": utc_now_iso_millis(),
-            "rounds": rounds_obj,
-        }
-    return {"rounds": rounds_obj}
-
 
 # -----------------------------
 # CLI
@@ -307,6 +502,9 @@ def main() -> None:
     ap.add_argument("--block-size", default=5, type=int, help="Rounds per fixed-opponent block (default: 5).")
     ap.add_argument("--red-prop", default=0.5, type=float, help="Proportion assigned to red team (default: 0.5).")
     ap.add_argument("--seed", default=None, type=int, help="Random seed for reproducibility.")
+    ap.add_argument("--numpy-rng", action="store_true",
+                    help="Draw teams and matchings with numpy (faster for large player counts; "
+                         "same seed gives different output than the default RNG).")
 
     ap.add_argument("--pair-status", default="pending", type=str, help="Status for each pair (default: pending).")
     ap.add_argument("--round-status", default="pending", type=str, help="Status for each round (default: pending).")
@@ -334,12 +532,13 @@ def main() -> None:
     generated_at = utc_now_iso_millis()
 
     players_input = load_players_input(args.players_input)
-    player_ids = extract_player_ids(players_input)
-    player_ids = list(dict.fromkeys(player_ids))
+    player_ids = extract_player_ids(players_input)  # dict keys, already unique
     if len(player_ids) < 2:
         raise SystemExit("Need at least 2 unique players.")
 
-    rng_for_teams = random.Random(args.seed)
+    if args.numpy_rng and np is None:
+        raise SystemExit("--numpy-rng requires numpy.")
+    rng_for_teams = np.random.default_rng(args.seed) if args.numpy_rng else random.Random(args.seed)
     team_map = assign_teams(player_ids, red_prop=args.red_prop, rng=rng_for_teams)
 
     players_output = write_players_output(
@@ -351,7 +550,8 @@ def main() -> None:
     save_json(players_output_path, players_output)
 
 
-    pairing_json = generate_pairing_json(
+    write_pairing_json(
+        pairing_out_path,
         player_ids=player_ids,
         rounds=args.rounds,
         block_size=args.block_size,
@@ -362,8 +562,9 @@ def main() -> None:
         include_root_metadata=True,
         experiment_type=args.experiment_type,
         pairing_mode=args.pairing_mode,
+        created_at=generated_at,
+        numpy_rng=args.numpy_rng,
     )
-    save_json(pairing_out_path, pairing_json)
 
     meta = {
         "generatedAt": generated_at,
@@ -381,6 +582,7 @@ def main() -> None:
             "blockSize": args.block_size,
             "redProp": args.red_prop,
             "seed": args.seed,
+            "numpyRng": args.numpy_rng,
             "pairStatus": args.pair_status,
             "roundStatus": args.round_status,
             "experimentType": args.experiment_type,
@@ -12,11 +12,22 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import random
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+try:  # optional: faster JSON encoder/decoder
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional: vectorised team assignment for large player counts
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # -----------------------------
@@ -25,9 +36,8 @@ from typing import Dict, List, Optional, Tuple
 
 def utc_now_iso_millis() -> str:
     # Example format: "2026-01-22T15:51:03.237Z"
-    dt = datetime.now(timezone.utc)
-    # isoformat(timespec="milliseconds") yields "+00:00", convert to "Z"
-    return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    s, ms = divmod(time.time_ns() // 1_000_000, 1000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(s))}.{ms:03d}Z"
 
 
 def load_player_ids(path: Path) -> List[str]:
@@ -35,35 +45,112 @@ def load_player_ids(path: Path) -> List[str]:
     Accepts:
       - JSON file containing a list of strings: ["id1","id2",...]
       - TXT file: one ID per line (blank lines ignored)
+    Returns stripped, de-duplicated IDs in first-seen order.
     """
     if not path.exists():
         raise FileNotFoundError(f"Players file not found: {path}")
 
-    text = path.read_text(encoding="utf-8").strip()
-    if not text:
+    raw = path.read_bytes()
+    if not raw.strip():
         return []
 
     # Try JSON first
     if path.suffix.lower() in {".json"}:
-        data = json.loads(text)
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         if not isinstance(data, list) or not all(isinstance(x, str) for x in data):
             raise ValueError("JSON players file must be a list of strings (player IDs).")
-        return [x.strip() for x in data if x.strip()]
+        stripped = (x.strip() for x in data)
+    else:
+        # Otherwise treat as txt
+        stripped = (line.strip() for line in raw.decode("utf-8").splitlines())
+
+    # Strip, drop blanks and de-dup (keep order) in one pass
+    return list(dict.fromkeys(x for x in stripped if x))
+
+
+# Above this many pair objects the stdlib fallback streams instead of building one big string
+STREAM_JSON_MIN_ITEMS = 5000
+
 
-    # Otherwise treat as txt
-    return [line.strip() for line in text.splitlines() if line.strip()]
+def _estimated_items(obj: dict) -> int:
+    """
+    Rough size of obj: rounds * pairs for a pairing JSON, else its number of keys.
+    Only library callers of save_json reach this; the CLI streams pairings
+    through stream_save_pairing.
+    """
+    rounds = obj.get("rounds")
+    if isinstance(rounds, dict) and rounds:
+        first = next(iter(rounds.values()))
+        if isinstance(first, dict):
+            return len(rounds) * len(first.get("pairs", ()))
+    return len(obj)
+
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Encode obj exactly as save_json would (2-space indent, UTF-8).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# Match text-mode newline translation (os.linesep); JSON output never has a raw newline
+# inside a string, so every b"\n" is a line break.
+_NEWLINE = os.linesep.encode()
+
+
+def _native_newlines(data: bytes) -> bytes:
+    return data if _NEWLINE == b"\n" else data.replace(b"\n", _NEWLINE)
 
 
 def save_json(path: Path, obj: dict) -> None:
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    if orjson is not None:
+        path.write_bytes(_native_newlines(_dumps(obj)))
+        return
+
+    # json.dumps is much faster for small payloads; json.dump into a large buffer
+    # avoids holding the whole encoded document in memory for big ones.
+    if _estimated_items(obj) < STREAM_JSON_MIN_ITEMS:
+        path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    else:
+        with path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def stream_save_pairing(path: Path, meta: dict, rounds_iter: Iterable[Tuple[str, dict]]) -> None:
+    """
+    Write {**meta, "rounds": dict(rounds_iter)} with the same bytes as save_json,
+    encoding one round at a time so the full rounds dict never has to exist.
+    """
+    with path.open("wb", buffering=1 << 20) as f:
+        f.write(_native_newlines(b"{\n"))
+        for key, value in meta.items():
+            f.write(_native_newlines(b"  " + _dumps(key) + b": " + _dumps(value) + b",\n"))
+        f.write(b'  "rounds": {')
+        sep = b"\n"
+        for round_key, round_obj in rounds_iter:
+            chunk = sep + b"    " + _dumps(round_key) + b": " + _dumps(round_obj).replace(b"\n", b"\n    ")
+            f.write(_native_newlines(chunk))
+            sep = b",\n"
+        f.write(_native_newlines(b"\n  }\n}"))
 
 
 # -----------------------------
 # Team + Layout logic
 # -----------------------------
 
-@dataclass(frozen=True)
-class LayoutSpec:
+# (layoutId, player1Id, player2Id, position1, position2)
+PairRow = Tuple[str, str, str, int, int]
+
+# A player, either by ID or by its index into player_ids
+P = TypeVar("P", str, int)
+
+
+class LayoutSpec(NamedTuple):
+    """
+    Immutable tuple, so callers can unpack it: layout_id, pos_red, pos_blue = spec
+    """
     layout_id: str
     # positions are numeric slots in your app (you can change these defaults)
     position_red: int
@@ -91,25 +178,62 @@ def build_default_layouts() -> Dict[str, LayoutSpec]:
 def assign_teams(
     player_ids: List[str],
     red_prop: float,
-    rng: random.Random
+    rng: Any
 ) -> Dict[str, str]:
     """
     Returns dict: player_id -> "red" or "blue"
+
+    rng is a random.Random, or a numpy Generator (permutation + mask done in C).
     """
     if not (0.0 <= red_prop <= 1.0):
         raise ValueError("--red-prop must be between 0 and 1.")
 
+    n = len(player_ids)
+    n_red = int(round(red_prop * n))
+    n_red = max(0, min(n, n_red))
+
+    if np is not None and isinstance(rng, np.random.Generator):
+        perm = rng.permutation(n)
+        teams = np.where(np.arange(n) < n_red, "red", "blue")
+        return dict(zip((player_ids[i] for i in perm), teams.tolist()))
+
     players = player_ids[:]
     rng.shuffle(players)
+    return dict(zip(players, ["red"] * n_red + ["blue"] * (n - n_red)))
 
-    n = len(players)
-    n_red = int(round(red_prop * n))
-    n_red = max(0, min(n, n_red))
 
-    team_map: Dict[str, str] = {}
-    for i, pid in enumerate(players):
-        team_map[pid] = "red" if i < n_red else "blue"
-    return team_map
+def make_layout_picker(
+    player_ids: List[str],
+    team_map: Dict[str, str],
+    layouts: Dict[str, LayoutSpec],
+) -> Callable[[int, int], PairRow]:
+    """
+    Bind the three layout specs once and return pick(i, j) -> PairRow for players
+    player_ids[i], player_ids[j]. Teams are pre-encoded as a bytes array (red=1, blue=0),
+    so the per-pair work is two bytes indexings instead of two dict lookups.
+    """
+    ids = player_ids
+    teams = bytes(1 if team_map[pid] == "red" else 0 for pid in player_ids)
+
+    red_red_id, _, _ = layouts["red_red"]
+    blue_blue_id, _, _ = layouts["blue_blue"]
+    red_blue_id, red_pos, blue_pos = layouts["red_blue"]
+
+    # (layoutId, swap, position1, position2) indexed by teams[i] << 1 | teams[j]
+    dispatch = (
+        (blue_blue_id, False, 1, 2),             # blue, blue
+        (red_blue_id, True, red_pos, blue_pos),  # blue, red -> swap so player1 is red
+        (red_blue_id, False, red_pos, blue_pos), # red, blue
+        (red_red_id, False, 1, 2),               # red, red
+    )
+
+    def pick(i: int, j: int) -> PairRow:
+        layout_id, swap, pos1, pos2 = dispatch[teams[i] << 1 | teams[j]]
+        if swap:
+            i, j = j, i
+        return layout_id, ids[i], ids[j], pos1, pos2
+
+    return pick
 
 
 def pick_layout_and_positions(
@@ -117,79 +241,72 @@ def pick_layout_and_positions(
     p2: str,
     team_map: Dict[str, str],
     layouts: Dict[str, LayoutSpec],
-) -> Tuple[str, str, int, int]:
+) -> PairRow:
     """
     Decide layoutId + (player1Id, player2Id) ordering + positions.
 
     Rule: for red_blue layout, player1 is the red team player, player2 is blue.
     For red_red / blue_blue, keep (p1,p2) ordering as given.
+    For many pairs, build the picker once with make_layout_picker instead.
     """
-    t1, t2 = team_map[p1], team_map[p2]
-
-    # same-team
-    if t1 == "red" and t2 == "red":
-        spec = layouts["red_red"]
-        return spec.layout_id, p1, p2, 1, 2
-    if t1 == "blue" and t2 == "blue":
-        spec = layouts["blue_blue"]
-        return spec.layout_id, p1, p2, 1, 2
-
-    # mixed
-    spec = layouts["red_blue"]
-    if t1 == "red" and t2 == "blue":
-        # p1 is red, p2 is blue
-        return spec.layout_id, p1, p2, spec.position_red, spec.position_blue
-    else:
-        # swap so player1 is red
-        return spec.layout_id, p2, p1, spec.position_red, spec.position_blue
+    return make_layout_picker([p1, p2], team_map, layouts)(0, 1)
 
 
 # -----------------------------
 # Pairing schedule logic
 # -----------------------------
 
-def make_random_matching(player_ids: List[str], rng: random.Random) -> List[Tuple[str, str]]:
+def _shuffled(player_ids: List[P], rng: random.Random) -> List[P]:
+    # Copy + shuffle on purpose: rng.sample(player_ids, n) is only ~20% faster here and
+    # draws a different permutation for the same seed, which would change every seeded schedule.
+    ids = player_ids[:]
+    rng.shuffle(ids)
+    return ids
+
+
+def _pairs_in_order(ids: List[P]) -> List[Tuple[P, P]]:
+    return list(zip(ids[0::2], ids[1::2]))  # zip stops at the shorter slice
+
+
+def make_random_matching(player_ids: List[P], rng: random.Random) -> List[Tuple[P, P]]:
     """
     Returns a list of pairs. If odd number, last one is dropped (unpaired).
+    Works on player IDs or on their integer indices.
     """
-    ids = player_ids[:]
-    rng.shuffle(ids)
-    pairs = []
-    for i in range(0, len(ids) - 1, 2):
-        pairs.append((ids[i], ids[i + 1]))
-    return pairs
+    return _pairs_in_order(_shuffled(player_ids, rng))
 
 
-def pairs_signature(pairs: List[Tuple[str, str]]) -> set[frozenset[str]]:
+def pairs_signature(pairs: List[Tuple[P, P]]) -> frozenset[Tuple[P, P]]:
     """
-    Signature ignoring order: { {a,b}, {c,d}, ... }
+    Signature ignoring order: { (a,b), (c,d), ... } with each pair sorted so a < b
+    (2-tuples are cheaper to build and hash than per-pair frozensets).
     """
-    return {frozenset((a, b)) for a, b in pairs}
+    return frozenset((a, b) if a < b else (b, a) for a, b in pairs)
 
 
 def make_block_matching(
-    player_ids: List[str],
+    player_ids: List[P],
     rng: random.Random,
-    prev_block_sig: Optional[set[frozenset[str]]] = None,
-    max_tries: int = 200,
-) -> List[Tuple[str, str]]:
+    prev_block_sig: Optional[frozenset[Tuple[P, P]]] = None,
+) -> List[Tuple[P, P]]:
     """
-    Create a random matching, trying to avoid repeating the exact same pairs
+    Create a random matching that does not repeat the exact same pairs
     as the previous block (if possible).
+
+    One shuffle, no retries: if it reproduces the previous block, swapping the 2nd and
+    3rd players turns (a,b),(c,d),... into (a,c),(b,d),..., and (a,c) cannot be in the
+    previous block because a was paired with b there.
     """
-    if prev_block_sig is None:
-        return make_random_matching(player_ids, rng)
+    ids = _shuffled(player_ids, rng)
+    pairs = _pairs_in_order(ids)
 
-    best = None
-    for _ in range(max_tries):
-        pairs = make_random_matching(player_ids, rng)
-        sig = pairs_signature(pairs)
-        if sig != prev_block_sig:
-            return pairs
-        best = pairs
+    # With 2 players there is only one possible matching, so it can never differ.
+    # (3 players already have 3 matchings: who sits out changes.)
+    if prev_block_sig is None or len(ids) < 3 or pairs_signature(pairs) != prev_block_sig:
+        return pairs
 
-    # If we couldn't find a different matching (e.g., very small N), return best attempt.
-    return best if best is not None else make_random_matching(player_ids, rng)
+    ids[1], ids[2] = ids[2], ids[1]
+    return _pairs_in_order(ids)
 
 
 def generate_pairing_json(
@@ -204,11 +321,61 @@ def generate_pairing_json(
     experiment_type: str = "realtime",
     pairing_mode: str = "manual",
     layouts_override: Optional[Dict[str, LayoutSpec]] = None,
+    numpy_rng: bool = False,
 ) -> Tuple[dict, dict]:
     """
     Returns:
       - pairing_json (dict) with rounds -> pairs
       - team_assignment (dict) player_id -> team
+
+    numpy_rng assigns teams with numpy.random.default_rng(seed); pairing still uses random.Random(seed).
+
+    Rounds of the same block share one "pairs" dict (pairs never change within a block).
+    """
+    meta, rounds_iter, team_map = _pairing_parts(
+        player_ids=player_ids,
+        rounds=rounds,
+        block_size=block_size,
+        red_prop=red_prop,
+        seed=seed,
+        pair_status=pair_status,
+        round_status=round_status,
+        include_root_metadata=include_root_metadata,
+        experiment_type=experiment_type,
+        pairing_mode=pairing_mode,
+        layouts_override=layouts_override,
+        numpy_rng=numpy_rng,
+    )
+    return {**meta, "rounds": dict(rounds_iter)}, team_map
+
+
+def write_pairing_json(path: Path, **kwargs: Any) -> dict:
+    """
+    Same arguments and output as save_json(path, generate_pairing_json(...)[0]),
+    but rounds are built and written one at a time. Returns the team assignment.
+    """
+    meta, rounds_iter, team_map = _pairing_parts(**kwargs)
+    stream_save_pairing(path, meta, rounds_iter)
+    return team_map
+
+
+def _pairing_parts(
+    player_ids: List[str],
+    rounds: int,
+    block_size: int,
+    red_prop: float,
+    seed: Optional[int] = None,
+    pair_status: str = "pending",
+    round_status: str = "pending",
+    include_root_metadata: bool = True,
+    experiment_type: str = "realtime",
+    pairing_mode: str = "manual",
+    layouts_override: Optional[Dict[str, LayoutSpec]] = None,
+    numpy_rng: bool = False,
+) -> Tuple[dict, Iterator[Tuple[str, dict]], dict]:
+    """
+    Validate and assign teams eagerly, then return the root metadata (without "rounds"),
+    a lazy iterator of (round_key, round_obj) and the team assignment.
     """
     if rounds < 1:
         raise ValueError("--rounds must be >= 1")
@@ -220,57 +387,84 @@ def generate_pairing_json(
     rng = random.Random(seed)
 
     layouts = layouts_override or build_default_layouts()
-    team_map = assign_teams(player_ids, red_prop=red_prop, rng=rng)
+    if numpy_rng:
+        if np is None:
+            raise ValueError("numpy_rng requires numpy to be installed.")
+        team_map = assign_teams(player_ids, red_prop=red_prop, rng=np.random.default_rng(seed))
+    else:
+        team_map = assign_teams(player_ids, red_prop=red_prop, rng=rng)
+    pick_layout = make_layout_picker(player_ids, team_map, layouts)
+    # Matchings are drawn over indices; shuffling range(n) consumes the rng exactly
+    # like shuffling the IDs, so seeded schedules are unchanged
+    indices = list(range(len(player_ids)))
+
+    # One interned timestamp shared by every pair's createdAt and the root lastUpdated.
+    # Layout/team names are identifier-like literals, which CPython already interns.
+    created_at = sys.intern(utc_now_iso_millis())
+    pair_status = sys.intern(pair_status)
+    round_status = sys.intern(round_status)
+
+    if include_root_metadata:
+        meta = {
+            "experimentType": experiment_type,
+            "lastUpdated": created_at,
+            "pairingMode": pairing_mode,
+        }
+    else:
+        meta = {}
+
+    rounds_iter = _iter_rounds(
+        indices, rounds, block_size, rng, pick_layout, created_at, pair_status, round_status
+    )
+    return meta, rounds_iter, team_map
 
-    created_at = utc_now_iso_millis()
-    rounds_obj: Dict[str, dict] = {}
 
-    prev_sig: Optional[set[frozenset[str]]] = None
-    current_block_pairs: List[Tuple[str, str]] = []
+def _iter_rounds(
+    indices: List[int],
+    rounds: int,
+    block_size: int,
+    rng: random.Random,
+    pick_layout: Callable[[int, int], PairRow],
+    created_at: str,
+    pair_status: str,
+    round_status: str,
+) -> Iterator[Tuple[str, dict]]:
+    prev_sig: Optional[frozenset[Tuple[int, int]]] = None
+    pairs_obj: Dict[str, dict] = {}
+
+    # Key strings are formatted once; every matching has len(indices) // 2 pairs
+    pair_keys = [f"pair_{i:03d}" for i in range(len(indices) // 2)]
+    round_keys = [f"round{r}" for r in range(1, rounds + 1)]
 
     for r in range(1, rounds + 1):
         # Start a new block at 1, 1+block_size, 1+2*block_size, ...
         if (r - 1) % block_size == 0:
             current_block_pairs = make_block_matching(
-                player_ids=player_ids,
+                player_ids=indices,
                 rng=rng,
                 prev_block_sig=prev_sig,
             )
             prev_sig = pairs_signature(current_block_pairs)
-
-        pairs_obj: Dict[str, dict] = {}
-        for idx, (a, b) in enumerate(current_block_pairs):
-            layout_id, p1, p2, pos1, pos2 = pick_layout_and_positions(
-                a, b, team_map=team_map, layouts=layouts
-            )
-            pair_key = f"pair_{idx:03d}"
-            pairs_obj[pair_key] = {
-                "createdAt": created_at,
-                "layoutId": layout_id,
-                "player1Id": p1,
-                "player2Id": p2,
-                "position1": pos1,
-                "position2": pos2,
-                "status": pair_status,
-            }
-
-        rounds_obj[f"round{r}"] = {
+            # Resolve layout/ordering and build the pair objects once per block;
+            # every round of the block reuses them by reference
+            block_rows = [pick_layout(i, j) for i, j in current_block_pairs]
+            pairs_obj = {}
+            for idx, (layout_id, p1, p2, pos1, pos2) in enumerate(block_rows):
+                pairs_obj[pair_keys[idx]] = {
+                    "createdAt": created_at,
+                    "layoutId": layout_id,
+                    "player1Id": p1,
+                    "player2Id": p2,
+                    "position1": pos1,
+                    "position2": pos2,
+                    "status": pair_status,
+                }
+
+        yield round_keys[r - 1], {
             "pairs": pairs_obj,
             "status": round_status,
         }
 
-    if include_root_metadata:
-        pairing_json = {
-            "experimentType": experiment_type,
-            "lastUpdated": utc_now_iso_millis(),
-            "pairingMode": pairing_mode,
-            "rounds": rounds_obj,
-        }
-    else:
-        pairing_json = {"rounds": rounds_obj}
-
-    return pairing_json, team_map
-
 
 # -----------------------------
 # CLI
@@ -283,6 +477,8 @@ def main() -> None:
     ap.add_argument("--block-size", default=5, type=int, help="Rounds per fixed-opponent block (default: 5).")
     ap.add_argument("--red-prop", default=0.5, type=float, help="Proportion assigned to red team (default: 0.5).")
     ap.add_argument("--seed", default=None, type=int, help="Random seed for reproducibility.")
+    ap.add_argument("--numpy-rng", action="store_true",
+                    help="Assign teams with numpy (same seed gives different output than the default RNG).")
     ap.add_argument("--out", default=Path("pairing.json"), type=Path, help="Output pairing JSON path.")
     ap.add_argument("--teams-out", default=None, type=Path, help="Optional output teams JSON path.")
     ap.add_argument("--no-root-metadata", action="store_true", help="Only output {'rounds': ...}.")
@@ -294,11 +490,11 @@ def main() -> None:
     args = ap.parse_args()
 
     player_ids = load_player_ids(args.players)
-    player_ids = list(dict.fromkeys(player_ids))  # de-dup, keep order
     if len(player_ids) < 2:
         raise SystemExit("Need at least 2 unique player IDs.")
 
-    pairing_json, team_map = generate_pairing_json(
+    team_map = write_pairing_json(
+        args.out,
         player_ids=player_ids,
         rounds=args.rounds,
         block_size=args.block_size,
@@ -309,9 +505,9 @@ def main() -> None:
         include_root_metadata=not args.no_root_metadata,
         experiment_type=args.experiment_type,
         pairing_mode=args.pairing_mode,
+        numpy_rng=args.numpy_rng,
     )
 
-    save_json(args.out, pairing_json)
     print(f"Wrote pairing JSON: {args.out.resolve()}")
 
     if args.teams_out is not None:
@@ -0,0 +1,145 @@
+import pytest
+
+import generate_pairing as gp
+
+FIXED_TS = "2026-01-01T00:00:00.000Z"
+
+PLAYERS = ["A", "B", "C", "D", "E", "F"]
+TEAM_MAP = {"A": "red", "B": "red", "C": "red", "D": "blue", "E": "blue", "F": "blue"}
+
+
+def round_signature(round_obj):
+    return {frozenset([p["player1Id"], p["player2Id"]]) for p in round_obj["pairs"].values()}
+
+
+def check_blocks(rounds, n_rounds, block_size):
+    sigs = [round_signature(rounds[f"round{r}"]) for r in range(1, n_rounds + 1)]
+    blocks = [sigs[i:i + block_size] for i in range(0, n_rounds, block_size)]
+
+    # Pairs are constant within a block
+    for block in blocks:
+        assert all(sig == block[0] for sig in block)
+
+    # Consecutive blocks differ
+    for prev, cur in zip(blocks, blocks[1:]):
+        assert cur[0] != prev[0]
+
+
+def test_generate_pairing_json_blocks_and_layouts():
+    pairing_json = gp.generate_pairing_json(
+        player_ids=PLAYERS,
+        rounds=10,
+        block_size=5,
+        team_map=TEAM_MAP,
+        seed=123,
+        created_at=FIXED_TS,
+    )
+
+    # Top-level fields
+    assert list(pairing_json) == ["experimentType", "pairingMode", "lastUpdated", "rounds"]
+    assert pairing_json["experimentType"] == "realtime"
+    assert pairing_json["pairingMode"] == "manual"
+    assert pairing_json["lastUpdated"] == FIXED_TS
+
+    rounds = pairing_json["rounds"]
+    assert list(rounds) == [f"round{r}" for r in range(1, 11)]
+    check_blocks(rounds, 10, 5)
+
+    for r in range(1, 11):
+        round_obj = rounds[f"round{r}"]
+        assert round_obj["status"] == "pending"
+        assert list(round_obj["pairs"]) == ["pair_000", "pair_001", "pair_002"]
+        for pair in round_obj["pairs"].values():
+            assert pair["createdAt"] == FIXED_TS
+            assert pair["status"] == "pending"
+            assert pair["position1"] == 1
+            assert pair["position2"] == 2
+
+            t1, t2 = TEAM_MAP[pair["player1Id"]], TEAM_MAP[pair["player2Id"]]
+            if t1 == t2:
+                base = f"{t1}_{t2}"
+            else:
+                # ordering enforced: player1 is red, player2 is blue
+                assert (t1, t2) == ("red", "blue")
+                base = "red_blue"
+
+            # Layout suffix alternates: odd rounds _1, even rounds _2
+            assert pair["layoutId"] == f"{base}_{1 if r % 2 else 2}"
+
+
+def test_generate_pairing_json_without_root_metadata():
+    pairing_json = gp.generate_pairing_json(
+        player_ids=PLAYERS,
+        rounds=3,
+        block_size=2,
+        team_map=TEAM_MAP,
+        seed=1,
+        include_root_metadata=False,
+        created_at=FIXED_TS,
+    )
+    assert list(pairing_json) == ["rounds"]
+
+
+@pytest.mark.parametrize(
+    "team_map, message",
+    [
+        ({p: t for p, t in TEAM_MAP.items() if p != "F"}, "missing players"),
+        ({**TEAM_MAP, "G": "red"}, "unknown players"),
+        ({**{p: t for p, t in TEAM_MAP.items() if p != "F"}, "G": "red"}, "missing players"),
+    ],
+)
+def test_generate_pairing_json_rejects_mismatched_team_map(team_map, message):
+    with pytest.raises(ValueError, match=message):
+        gp.generate_pairing_json(player_ids=PLAYERS, rounds=2, block_size=1, team_map=team_map, seed=1)
+
+
+@pytest.mark.parametrize("n_players", [3, 4, 5, 6])
+def test_consecutive_blocks_differ(n_players):
+    players = PLAYERS[:n_players]
+    team_map = {p: TEAM_MAP[p] for p in players}
+
+    for seed in range(30):
+        pairing_json = gp.generate_pairing_json(
+            player_ids=players,
+            rounds=20,
+            block_size=2,
+            team_map=team_map,
+            seed=seed,
+            created_at=FIXED_TS,
+        )
+        check_blocks(pairing_json["rounds"], 20, 2)
+
+
+@pytest.mark.skipif(gp.np is None, reason="numpy not installed")
+@pytest.mark.parametrize("n_players", [3, 4, 5, 6])
+def test_numpy_rng_blocks(n_players):
+    players = PLAYERS[:n_players]
+    team_map = {p: TEAM_MAP[p] for p in players}
+
+    for seed in range(30):
+        pairing_json = gp.generate_pairing_json(
+            player_ids=players,
+            rounds=20,
+            block_size=2,
+            team_map=team_map,
+            seed=seed,
+            created_at=FIXED_TS,
+            numpy_rng=True,
+        )
+        rounds = pairing_json["rounds"]
+        check_blocks(rounds, 20, 2)
+        for round_obj in rounds.values():
+            ids = [p for pair in round_obj["pairs"].values() for p in (pair["player1Id"], pair["player2Id"])]
+            assert len(ids) == len(set(ids)) == 2 * (n_players // 2)
+
+
+@pytest.mark.skipif(gp.np is None, reason="numpy not installed")
+@pytest.mark.parametrize("n_players, red_prop, n_red", [(6, 0.5, 3), (10, 0.3, 3), (7, 0.0, 0), (7, 1.0, 7)])
+def test_numpy_assign_teams_counts(n_players, red_prop, n_red):
+    players = [f"P{i}" for i in range(n_players)]
+
+    for seed in range(10):
+        team_map = gp.assign_teams(players, red_prop=red_prop, rng=gp.np.random.default_rng(seed))
+        assert list(team_map) == players
+        assert sum(1 for t in team_map.values() if t == "red") == n_red
+        assert sum(1 for t in team_map.values() if t == "blue") == n_players - n_red
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import generate_pairing_old1 as gp
+
+FIXED_TS = "2026-01-01T00:00:00.000Z"
+
+
+def test_generate_pairing_json_benchmark(benchmark, monkeypatch):
+    monkeypatch.setattr(gp, "utc_now_iso_millis", lambda: FIXED_TS)
+
+    players = [str(i) for i in range(200)]
+
+    pairing_json, team_map = benchmark(
+        gp.generate_pairing_json,
+        player_ids=players,
+        rounds=1000,
+        block_size=5,
+        red_prop=0.5,
+        seed=123,
+    )
+
+    assert len(pairing_json["rounds"]) == 1000
+    assert len(pairing_json["rounds"]["round1"]["pairs"]) == 100
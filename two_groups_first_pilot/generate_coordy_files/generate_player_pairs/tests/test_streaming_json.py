@@ -0,0 +1,67 @@
+import pytest
+
+import generate_pairing as gp
+import generate_pairing_old1 as gp1
+
+FIXED_TS = "2026-01-01T00:00:00.000Z"
+
+PLAYERS = ["A", "B", "C", "D", "E", "F", "G", "Zoë"]
+
+
+@pytest.mark.parametrize("include_root_metadata", [True, False])
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+def test_write_pairing_json_matches_save_json(tmp_path, monkeypatch, include_root_metadata, use_orjson, newline):
+    if use_orjson and gp.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(gp, "orjson", None)
+    # Simulate the Windows text-mode line endings as well as the native ones
+    monkeypatch.setattr(gp, "_NEWLINE", newline)
+
+    kwargs = dict(
+        player_ids=PLAYERS,
+        rounds=7,
+        block_size=3,
+        team_map={p: "red" if i % 3 else "blue" for i, p in enumerate(PLAYERS)},
+        seed=123,
+        include_root_metadata=include_root_metadata,
+        created_at=FIXED_TS,
+    )
+
+    expected = tmp_path / "expected.json"
+    streamed = tmp_path / "streamed.json"
+    gp.save_json(expected, gp.generate_pairing_json(**kwargs))
+    gp.write_pairing_json(streamed, **kwargs)
+
+    assert streamed.read_bytes() == expected.read_bytes()
+
+
+@pytest.mark.parametrize("include_root_metadata", [True, False])
+@pytest.mark.parametrize("encoder", ["orjson", "json.dumps", "json.dump"])
+def test_stream_save_pairing_matches_save_json(tmp_path, monkeypatch, include_root_metadata, encoder):
+    if encoder == "orjson" and gp1.orjson is None:
+        pytest.skip("orjson not installed")
+    if encoder != "orjson":
+        monkeypatch.setattr(gp1, "orjson", None)
+    if encoder == "json.dump":
+        # Force save_json's buffered json.dump branch
+        monkeypatch.setattr(gp1, "STREAM_JSON_MIN_ITEMS", 0)
+    monkeypatch.setattr(gp1, "utc_now_iso_millis", lambda: FIXED_TS)
+
+    kwargs = dict(
+        player_ids=PLAYERS,
+        rounds=7,
+        block_size=3,
+        red_prop=0.5,
+        seed=123,
+        include_root_metadata=include_root_metadata,
+    )
+
+    expected = tmp_path / "expected.json"
+    streamed = tmp_path / "streamed.json"
+    pairing_json, team_map = gp1.generate_pairing_json(**kwargs)
+    gp1.save_json(expected, pairing_json)
+
+    assert gp1.write_pairing_json(streamed, **kwargs) == team_map
+    assert streamed.read_bytes() == expected.read_bytes()